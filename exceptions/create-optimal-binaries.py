@@ -1,8 +1,13 @@
 """Generate optimized binaries for each gate using best configurations from grid search results."""
 import subprocess
 import re
+import glob
+import hashlib
 import os
+import shutil
 import sys
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
 
 # Best configurations from grid search results
 BEST_CONFIGS = {
@@ -15,103 +20,138 @@ BEST_CONFIGS = {
     'MUX': {'threshold': 275, 'delay': 256}
 }
 
-GATE_FUNCTIONS = {
-    'AND': ('do_and_gate', 2),
-    'OR': ('do_or_gate', 2),
-    'ASSIGN': ('do_assign_gate', 1),
-    'NOT': ('do_not_gate', 1),
-    'NAND': ('do_nand_gate', 2),
-    'XOR': ('do_xor_gate', 2),
-    'MUX': ('do_mux_gate', 3)
-}
+# Compiler invocation shared by all builds; -pipe skips the temp files
+# between cc1 and as, and ccache (if installed) shares its cache with
+# grid-search.py
+CXX_CMD = ['g++', '-pipe', '-O2', '-fno-plt', '-D', 'INTEL', '-I', '.', '-I', 'gates']
+if shutil.which('ccache'):
+    os.environ.setdefault('CCACHE_DIR', os.path.abspath('grid-search-results/.ccache'))
+    CXX_CMD = ['ccache'] + CXX_CMD
+
+# Transient build inputs go to tmpfs when available, keeping them out of
+# the on-disk source tree entirely
+TMPFS_DIR = '/dev/shm' if os.path.isdir('/dev/shm') else None
+
+def run_silent(cmd):
+    """Run a command whose output is ignored without accumulating it in a
+    pipe; on failure, rerun capturing the output so the diagnostics are
+    actually visible"""
+    try:
+        subprocess.run(cmd, check=True, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    except subprocess.CalledProcessError:
+        rerun = subprocess.run(cmd, capture_output=True, text=True)
+        sys.stderr.write(rerun.stderr)
+        raise
+
+# Source files read once at import time instead of once per gate
+with open('gates/compose.cpp', 'r') as f:
+    _COMPOSE_SRC = f.read()
+with open('main.cpp', 'r') as f:
+    _MAIN_SRC = f.read()
+
+# Turn compose.cpp into a template once at import time: the regex scan
+# over the full file runs a single time, and per-gate instantiation is a
+# plain str.replace of the sentinels. main.cpp takes threshold and delay
+# at runtime (they only live in compose.cpp), so it needs no templating
+# and the exact same translation unit serves every gate.
+_COMPOSE_TEMPLATE = re.sub(r'#define THRESHOLD \d+', '#define THRESHOLD @THRESHOLD@', _COMPOSE_SRC)
+_COMPOSE_TEMPLATE = re.sub(r'#define DELAY \d+', '#define DELAY @DELAY@', _COMPOSE_TEMPLATE)
+
+def create_workspace():
+    """Create one shared tmpfs workspace for the whole run, seeded with
+    hardlinks of the gate headers (falling back to copies across
+    filesystems) so every worker compiles against the same sealed
+    snapshot of the tree without duplicating any file data"""
+    workspace = tempfile.mkdtemp(prefix='optbin_', dir=TMPFS_DIR)
+    os.makedirs(os.path.join(workspace, 'gates'))
+    for header in glob.glob('gates/*.h'):
+        try:
+            os.link(header, os.path.join(workspace, header))
+        except OSError:
+            shutil.copy2(header, os.path.join(workspace, header))
+    return workspace
+
+def compile_cached(source_text, name, workspace):
+    """Compile a translation unit into build/, reusing the object file when
+    the same source content was already compiled with the same flags
+    (keyed by a hash of the compiler command and the content). A rebuild
+    where only the other translation unit changed then skips straight to
+    the link step"""
+    key = hashlib.sha256((' '.join(CXX_CMD) + source_text).encode()).hexdigest()[:16]
+    obj = f'build/{name}_{key}.o'
+
+    if os.path.exists(obj):
+        return obj
 
-def create_optimized_binary(gate_name, threshold, delay):
+    # Per-worker source name inside the shared workspace; the parent
+    # removes the whole workspace once at the end of the run
+    source_file = os.path.join(workspace, f'{name}_{key}_{os.getpid()}.cpp')
+    with open(source_file, 'w') as f:
+        f.write(source_text)
+
+    # Compile to a private path first so concurrent workers racing on
+    # the same content hash never see a half-written object file
+    temp_obj = f'{obj}.{os.getpid()}.tmp'
+    run_silent(CXX_CMD + ['-I', workspace, '-I', os.path.join(workspace, 'gates'),
+                          '-c', '-o', temp_obj, source_file])
+    os.replace(temp_obj, obj)
+
+    return obj
+
+def create_optimized_binary(gate_name, threshold, delay, workspace):
     """Create an optimized binary for a specific gate with given threshold and delay"""
     print(f"Creating optimized binary for {gate_name} gate (T={threshold}, D={delay})...")
-    
-    # Get gate function and input count
-    gate_function, input_count = GATE_FUNCTIONS[gate_name]
-    
-    # Read original compose.cpp
-    with open('gates/compose.cpp', 'r') as f:
-        content_compose = f.read()
-    
-    # Modify parameters in compose.cpp
-    modified_content_compose = re.sub(r'#define THRESHOLD \d+', f'#define THRESHOLD {threshold}', content_compose)
-    modified_content_compose = re.sub(r'#define DELAY \d+', f'#define DELAY {delay}', modified_content_compose)
-    
-    # Write temporary compose file
-    temp_compose_file = f'gates/compose_{gate_name.lower()}.cpp'
-    with open(temp_compose_file, 'w') as f:
-        f.write(modified_content_compose)
-
-    # Read original main.cpp
-    with open('main.cpp', 'r') as f:
-        content_main = f.read()
-    
-    # Modify parameters and gate-specific content in main.cpp
-    modified_content_main = re.sub(r'#define THRESHOLD \d+', f'#define THRESHOLD {threshold}', content_main)
-    modified_content_main = re.sub(r'#define DELAY \d+', f'#define DELAY {delay}', modified_content_main)
-    modified_content_main = re.sub(r'#include "gates/compose.cpp"', f'#include "gates/compose_{gate_name.lower()}.cpp"', modified_content_main)
-    
-    # Replace the gate testing template
-    modified_content_main = re.sub(r'test_gate\("GATE_NAME_PLACEHOLDER", GATE_FUNCTION_PLACEHOLDER, GATE_INPUTS_PLACEHOLDER\);', 
-                                 f'test_gate("{gate_name}", {gate_function}, {input_count});', modified_content_main)
-
-    # Write temporary main file
-    temp_main_file = f'main_{gate_name.lower()}.cpp'
-    with open(temp_main_file, 'w') as f:
-        f.write(modified_content_main)
-    
+
+    # Fill in the parameters in the compose.cpp template
+    modified_content_compose = (_COMPOSE_TEMPLATE
+                                .replace('@THRESHOLD@', str(threshold))
+                                .replace('@DELAY@', str(delay)))
+
     try:
-        # Clean previous builds
-        subprocess.run(['make', 'clean'], check=True, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
-        
-        # Ensure build directory exists
-        if not os.path.exists('build'):
-            os.makedirs('build')
-        
-        # Ensure optimal-binaries directory exists
-        if not os.path.exists('optimal-binaries'):
-            os.makedirs('optimal-binaries')
-            
-        # Compile compose object file
-        compose_obj = f'build/compose_{gate_name.lower()}.o'
-        subprocess.run(['g++', '-O2', '-D', 'INTEL', '-c', '-o', compose_obj, temp_compose_file], 
-                      check=True, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
-        
-        # Compile main program and place in optimal-binaries folder
+        # Compile (or reuse) the two object files, then link; main.cpp is
+        # identical for every gate, so its object compiles once and is
+        # shared across all seven binaries
+        compose_obj = compile_cached(modified_content_compose, 'compose', workspace)
+        main_obj = compile_cached(_MAIN_SRC, 'main', workspace)
+
         binary_name = f'optimal-binaries/main_{gate_name.lower()}.elf'
-        subprocess.run(['g++', '-O2', '-D', 'INTEL', '-o', binary_name, temp_main_file, compose_obj, '-lm'], 
-                       check=True, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
-        
+        run_silent(CXX_CMD + ['-o', binary_name, main_obj, compose_obj, '-lm'])
+
         print(f"✓ Successfully created {binary_name}")
         return True
-        
+
     except subprocess.CalledProcessError as e:
         print(f"✗ Error creating binary for {gate_name}: {e}")
         return False
-        
-    finally:
-        # Clean up temporary files
-        if os.path.exists(temp_main_file):
-            os.remove(temp_main_file)
-        if os.path.exists(temp_compose_file):
-            os.remove(temp_compose_file)
 
 def main():
     print("Generating optimized binaries for each gate...")
     print("=" * 50)
-    
+
+    # Pre-create the output directories once
+    os.makedirs('build', exist_ok=True)
+    os.makedirs('optimal-binaries', exist_ok=True)
+
     successful_builds = 0
     total_builds = len(BEST_CONFIGS)
-    
-    for gate_name, config in BEST_CONFIGS.items():
-        success = create_optimized_binary(gate_name, config['threshold'], config['delay'])
-        if success:
-            successful_builds += 1
-        print()  # Add spacing between gates
-    
+
+    # One shared temp workspace for all workers, cleaned up in one go
+    workspace = create_workspace()
+
+    try:
+        # The per-gate builds are independent, so compile them concurrently
+        with ProcessPoolExecutor(max_workers=min(len(BEST_CONFIGS), os.cpu_count())) as executor:
+            futures = {
+                gate_name: executor.submit(create_optimized_binary, gate_name,
+                                           config['threshold'], config['delay'], workspace)
+                for gate_name, config in BEST_CONFIGS.items()
+            }
+            for gate_name in sorted(futures):
+                if futures[gate_name].result():
+                    successful_builds += 1
+    finally:
+        shutil.rmtree(workspace, ignore_errors=True)
+
     print("=" * 50)
     print(f"Build Summary: {successful_builds}/{total_builds} binaries created successfully")
     
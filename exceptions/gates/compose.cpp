@@ -3,6 +3,11 @@
 #define THRESHOLD 125
 #define DELAY 128
 
+/* Runtime-configurable timing parameters, overridable from the command
+   line (see the argp options in main.cpp) */
+int threshold = THRESHOLD;
+int delay = DELAY;
+
 uint8_t tmp_reg1[4*512];
 uint8_t tmp_reg2[4*512];
 uint8_t tmp_reg3[4*512];
@@ -23,15 +28,15 @@ void nand_gate(uint8_t* in1, uint8_t* in2, uint8_t* out) {
     _mm_clflush(tmp_reg2);
     _mm_clflush(tmp_reg3);
     _mm_clflush(tmp_reg4);
-    for (volatile int z = 0; z < DELAY; z++) {}
+    for (volatile int z = 0; z < delay; z++) {}
 
     and_gate(in1, in2, tmp_reg1);
-    for (volatile int z = 0; z < DELAY; z++) {}
+    for (volatile int z = 0; z < delay; z++) {}
 
 #ifdef INTEL
     uint64_t clk = timer(tmp_reg1);
-    assign(tmp_reg2, clk <= THRESHOLD);
-    assign(tmp_reg3, clk <= THRESHOLD);
+    assign(tmp_reg2, clk <= threshold);
+    assign(tmp_reg3, clk <= threshold);
 #else
     assign_gate(tmp_reg1, tmp_reg2, tmp_reg3);
 #endif
@@ -56,7 +61,7 @@ void xor_gate(uint8_t* in1, uint8_t* in2, uint8_t* out, unsigned input) {
         _mm_clflush(tmp_reg8);
         _mm_clflush(tmp_reg9);
         _mm_clflush(tmp_reg10);
-        for (volatile int z = 0; z < DELAY; z++) {}
+        for (volatile int z = 0; z < delay; z++) {}
 
         // reg9 = in1 | in2
         or_gate(in1, in2, tmp_reg9);
@@ -64,16 +69,16 @@ void xor_gate(uint8_t* in1, uint8_t* in2, uint8_t* out, unsigned input) {
         assign(tmp_reg5, input & 1);
         assign(tmp_reg6, input & 2);
     #endif
-        for (volatile int z = 0; z < DELAY; z++) {}
+        for (volatile int z = 0; z < delay; z++) {}
 
         // reg10 = !(in1 & in2)
         nand_gate(tmp_reg5, tmp_reg6, tmp_reg10);
-        for (volatile int z = 0; z < DELAY; z++) {}
+        for (volatile int z = 0; z < delay; z++) {}
         
         // out = reg9 & reg10
     #ifdef INTEL
         uint64_t clk = timer(tmp_reg10);
-        assign(tmp_reg10, clk <= THRESHOLD);
+        assign(tmp_reg10, clk <= threshold);
     #endif
         and_gate(tmp_reg9, tmp_reg10, out);
 }
@@ -92,32 +97,32 @@ void mux_gate(uint8_t* in1, uint8_t* in2, uint8_t* in3, uint8_t* out, unsigned i
     _mm_clflush(tmp_reg5);
     _mm_clflush(tmp_reg6);
 #ifdef INTEL
-    for (volatile int z = 0; z < DELAY; z++) {}
+    for (volatile int z = 0; z < delay; z++) {}
 
     assign(in1, input & 1);
     and_gate(in2, in3, tmp_reg3);
     not_gate(tmp_reg1, tmp_reg2, tmp_reg4, tmp_reg5);
-    for (volatile int z = 0; z < DELAY; z++) {}
+    for (volatile int z = 0; z < delay; z++) {}
 
     uint64_t clk = timer(tmp_reg4);
-    assign(tmp_reg4, clk <= THRESHOLD);
+    assign(tmp_reg4, clk <= threshold);
     uint64_t clk2 = timer(tmp_reg3);
     and_gate(in1, tmp_reg4, tmp_reg6);
-    for (volatile int z = 0; z < DELAY; z++) {}
+    for (volatile int z = 0; z < delay; z++) {}
 
     clk = timer(tmp_reg6);
-    assign(tmp_reg6, clk <= THRESHOLD);
-    assign(tmp_reg3, clk2 <= THRESHOLD);
-    for (volatile int z = 0; z < DELAY; z++) {}
+    assign(tmp_reg6, clk <= threshold);
+    assign(tmp_reg3, clk2 <= threshold);
+    for (volatile int z = 0; z < delay; z++) {}
 #else
-    for (volatile int z = 0; z < DELAY; z++) {}
+    for (volatile int z = 0; z < delay; z++) {}
 
     and_gate(in2, in3, tmp_reg3);
     not_gate(tmp_reg1, tmp_reg2, tmp_reg4, tmp_reg5);
-    for (volatile int z = 0; z < DELAY; z++) {}
+    for (volatile int z = 0; z < delay; z++) {}
 
     and_gate(in1, tmp_reg4, tmp_reg6);
-    for (volatile int z = 0; z < DELAY; z++) {}
+    for (volatile int z = 0; z < delay; z++) {}
 #endif
 
     or_gate(tmp_reg3, tmp_reg6, out);
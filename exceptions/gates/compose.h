@@ -4,6 +4,10 @@
 #include"gates.h"
 #include "single.h"
 
+/* Runtime-configurable timing parameters (defaults in compose.cpp) */
+extern int threshold;
+extern int delay;
+
 void nand_gate(uint8_t* in1, uint8_t* in2, uint8_t* out);
 void xor_gate(uint8_t* in1, uint8_t* in2, uint8_t* out, unsigned input);
 void mux_gate(uint8_t* in1, uint8_t* in2, uint8_t* in3, uint8_t* out, unsigned input);
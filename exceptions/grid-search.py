@@ -1,9 +1,21 @@
 """Test combinations of threshold and delay values for all gates"""
 import subprocess
 import re
+import argparse
+import atexit
+import glob
+import hashlib
+import json
 import os
+import shutil
 import sys
-import time
+import tempfile
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+try:
+    from tqdm import tqdm
+except ImportError:
+    tqdm = None  # fall back to a plain textual counter
 
 GATE_NAMES = ['AND', 'OR', 'ASSIGN', 'NOT', 'NAND', 'XOR', 'MUX']
 THRESHOLDS = range(100, 301, 25)
@@ -12,170 +24,306 @@ DELAYS = [32, 48, 64, 96, 128, 192, 256, 512, 1024]
 # Number of trials of main.elf for every combination of threshold and delay
 AMT_TRIALS = 100 # (see `static struct argp_option options[]` in main.cpp)
 
-def test_parameters(threshold, delay):
-    """Test a specific combination of threshold and delay values for all gates"""
-    # Modify parameters in compose.cpp
-    with open('gates/compose.cpp', 'r') as f:
-        content_compose = f.read()
-    
-    modified_content_compose = re.sub(r'#define THRESHOLD \d+', f'#define THRESHOLD {threshold}', content_compose)
-    modified_content_compose = re.sub(r'#define DELAY \d+', f'#define DELAY {delay}', modified_content_compose)
-    
-    with open('gates/compose_temp.cpp', 'w') as f:
-        f.write(modified_content_compose)
+# Maximum number of compose object files kept in build/ between runs
+COMPOSE_OBJ_CACHE_SIZE = 128
 
-    # Modify parameters in main.cpp
-    with open('main.cpp', 'r') as f:
-        content_main = f.read()
-    
-    modified_content_main = re.sub(r'#define THRESHOLD \d+', f'#define THRESHOLD {threshold}', content_main)
-    modified_content_main = re.sub(r'#define DELAY \d+', f'#define DELAY {delay}', modified_content_main)
-    modified_content_main = re.sub(r'#include "gates/compose.cpp"', r'#include "gates/compose_temp.cpp"', modified_content_main)
+# Persistent cache of gate accuracies, keyed by source content and parameters
+RESULT_CACHE_DIR = 'grid-search-results/.cache'
 
-    with open('main_temp.cpp', 'w') as f:
-        f.write(modified_content_main)
-    
-    # Compile the modified file
+# Optimization level for the sweep binary. The gate drivers in main.cpp
+# and the composed gates are timing-sensitive, so the sweep must measure
+# the same -O2 code that create-optimal-binaries.py ships; with threshold
+# and delay as runtime flags the sweep pays for this compile only once,
+# so a cheaper -O0 build would change the results without saving time.
+OPT_FLAG = '-O2'
+
+# Compiler invocation shared by all builds; -pipe skips the temp files
+# between cc1 and as, and ccache (if installed) serves repeat compiles
+# straight from its cache under grid-search-results/
+CXX_CMD = ['g++', '-pipe', OPT_FLAG, '-fno-plt', '-D', 'INTEL', '-I', '.', '-I', 'gates']
+if shutil.which('ccache'):
+    os.environ.setdefault('CCACHE_DIR', os.path.abspath('grid-search-results/.ccache'))
+    CXX_CMD = ['ccache'] + CXX_CMD
+
+# Transient build inputs go to tmpfs when available, keeping them out of
+# the on-disk source tree entirely
+TMPFS_DIR = '/dev/shm' if os.path.isdir('/dev/shm') else None
+
+def run_silent(cmd):
+    """Run a command whose output is ignored without accumulating it in a
+    pipe; on failure, rerun capturing the output so the diagnostics are
+    actually visible"""
     try:
-        subprocess.run(['make', 'clean'], check=True, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
-        
-        # Ensure build directory exists
-        if not os.path.exists('build'):
-            os.makedirs('build')
-            
-        # Compile compose.o
-        subprocess.run(['g++', '-O2', '-D', 'INTEL', '-c', '-o', 'build/compose.o', 'gates/compose.cpp'], 
-                      check=True, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
-        
-        # Compile main program
-        subprocess.run(['g++', '-O2', '-D', 'INTEL', '-o', 'main_temp.elf', 'main_temp.cpp', 'build/compose.o', '-lm'], 
-                       check=True, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
-        
-        # Run the executable
-        result = subprocess.run(['./main_temp.elf', '-t', str(AMT_TRIALS)], 
-                              stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True)
-        
-        # Extract accuracy for all gates
-        gate_accuracies = {}
-        
-        for line in result.stdout.splitlines():
-            if "Correct rate: (avg, std)" in line:
-                idx = result.stdout.splitlines().index(line)
-                prev_line = result.stdout.splitlines()[idx-1]
-                for gate in GATE_NAMES:
-                    if f"=== {gate} gate" in prev_line:
-                        # More robust regex to capture all decimal places
-                        # This will match patterns like (99.9833%, capturing 99.9833
-                        accuracy_match = re.search(r'\(([0-9]*\.?[0-9]+)%', line)
-                        if accuracy_match:
-                            accuracy_str = accuracy_match.group(1)
-                            accuracy = float(accuracy_str)
-                            gate_accuracies[gate] = accuracy
-                            # Debug print - remove this later
-                            # print(f"DEBUG: {gate} - matched '{accuracy_str}' -> {accuracy}")
-                        else:
-                            print(f"WARNING: Could not extract accuracy for {gate} from line: {line}")
-                        break
-        
-        return gate_accuracies
-    
-    except subprocess.CalledProcessError as e:
-        print(f"Error during compilation or execution: {e}")
-        return {}
+        subprocess.run(cmd, check=True, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    except subprocess.CalledProcessError:
+        rerun = subprocess.run(cmd, capture_output=True, text=True)
+        sys.stderr.write(rerun.stderr)
+        raise
+
+# Number of (threshold, delay) combinations tested per main.elf invocation
+SWEEP_CHUNK_SIZE = 16
+
+# Precompiled patterns for the output parsing path; the gate-name
+# alternation makes one regex match both find the header and validate the
+# gate, instead of a per-line scan over GATE_NAMES
+CONFIG_RE = re.compile(r'Configuration: THRESHOLD=(\d+), DELAY=(\d+)')
+GATE_HEADER_RE = re.compile(r'=== (' + '|'.join(GATE_NAMES) + r') gate')
+# Matches patterns like (99.9833%, capturing 99.9833
+ACCURACY_RE = re.compile(r'Correct rate.*\(([\d.]+)%')
+
+# Source files read once at import time instead of once per combination
+with open('gates/compose.cpp', 'r') as f:
+    _COMPOSE_SRC = f.read()
+with open('main.cpp', 'r') as f:
+    _MAIN_SRC = f.read()
+
+# Shared hash state over the sources and the compiler invocation, copied
+# per cache-key computation; folding CXX_CMD in means changing OPT_FLAG
+# (or any other flag) re-measures instead of serving stale results
+_SOURCE_HASHER = hashlib.sha256()
+_SOURCE_HASHER.update(' '.join(CXX_CMD).encode())
+_SOURCE_HASHER.update(_COMPOSE_SRC.encode())
+_SOURCE_HASHER.update(_MAIN_SRC.encode())
+
+def result_cache_key(threshold, delay):
+    """Hash the compiler command, source files and test parameters into a
+    cache key, so cached results are invalidated whenever the flags,
+    sources or trial count change"""
+    hasher = _SOURCE_HASHER.copy()
+    hasher.update(f'{threshold},{delay},{AMT_TRIALS}'.encode())
+    return hasher.hexdigest()
+
+def compile_compose(modified_content_compose):
+    """Compile the given compose source, reusing a cached object file if the
+    same source was already compiled with the same flags (keyed by a hash
+    of the compiler command and the source content)"""
+    key = hashlib.sha256((' '.join(CXX_CMD) + modified_content_compose).encode()).hexdigest()[:16]
+    compose_obj = f'build/compose_{key}.o'
+
+    if os.path.exists(compose_obj):
+        # Mark as recently used so cache pruning keeps it
+        os.utime(compose_obj)
+        return compose_obj
+
+    tmpdir = tempfile.mkdtemp(prefix='gridsearch_', dir=TMPFS_DIR)
+    temp_compose_file = os.path.join(tmpdir, 'compose.cpp')
+    with open(temp_compose_file, 'w') as f:
+        f.write(modified_content_compose)
+
+    try:
+        run_silent(CXX_CMD + ['-c', '-o', compose_obj, temp_compose_file])
     finally:
-        # Clean up
-        if os.path.exists('main_temp.cpp'):
-            os.remove('main_temp.cpp')
-        if os.path.exists('main_temp.elf'):
-            os.remove('main_temp.elf')
-        if os.path.exists('gates/compose_temp.cpp'):
-            os.remove('gates/compose_temp.cpp')
-
-def main():
-    # Create a separate file for each gate to store results
-    result_files = {}
+        shutil.rmtree(tmpdir, ignore_errors=True)
+
+    # Drop the least recently used object files beyond the cache limit
+    cached_objs = sorted(glob.glob('build/compose_*.o'), key=os.path.getmtime)
+    for stale_obj in cached_objs[:-COMPOSE_OBJ_CACHE_SIZE]:
+        os.remove(stale_obj)
+
+    return compose_obj
+
+def build_test_binary():
+    """Compile main.elf once for the whole sweep; threshold and delay are
+    runtime flags of the binary, so no per-combination compile is needed"""
+    # Cheap syntax-only probe first, so broken sources fail fast instead
+    # of after a full optimized compile
+    run_silent(CXX_CMD + ['-fsyntax-only', 'main.cpp'])
+
+    compose_obj = compile_compose(_COMPOSE_SRC)
+    run_silent(CXX_CMD + ['-o', 'main.elf', 'main.cpp', compose_obj, '-lm'])
+
+def test_parameter_chunk(combos):
+    """Test a chunk of (threshold, delay) combinations for all gates in a
+    single main.elf invocation, amortizing process start-up and warm-up"""
+    results = {}
+
+    # Serve memoized combinations from the cache and only sweep the rest
+    cache_files = {}
+    uncached = []
+    for threshold, delay in combos:
+        cache_file = f'{RESULT_CACHE_DIR}/{result_cache_key(threshold, delay)}.json'
+        cache_files[(threshold, delay)] = cache_file
+        if os.path.exists(cache_file):
+            with open(cache_file, 'r') as f:
+                results[(threshold, delay)] = json.load(f)
+        else:
+            uncached.append((threshold, delay))
+
+    if not uncached:
+        return results
+
+    # Run the prebuilt executable once for all uncached combinations,
+    # streaming its output line by line instead of materializing it all
+    sweep_arg = ';'.join(f'{threshold},{delay}' for threshold, delay in uncached)
+    proc = subprocess.Popen(['./main.elf', '-t', str(AMT_TRIALS), '--sweep', sweep_arg],
+                            stdout=subprocess.PIPE, stderr=subprocess.PIPE,
+                            text=True, bufsize=1)
+
+    # Extract accuracy for all gates in a single pass over the output,
+    # tracking which configuration block and gate section we are in
+    current_combo = None
+    current_gate = None
+
+    for line in proc.stdout:
+        config_match = CONFIG_RE.search(line)
+        if config_match:
+            current_combo = (int(config_match.group(1)), int(config_match.group(2)))
+            current_gate = None
+            results[current_combo] = {}
+            continue
+
+        header_match = GATE_HEADER_RE.search(line)
+        if header_match:
+            current_gate = header_match.group(1)
+        elif current_gate and "Correct rate: (avg, std)" in line:
+            accuracy_match = ACCURACY_RE.search(line)
+            if accuracy_match:
+                results[current_combo][current_gate] = float(accuracy_match.group(1))
+            else:
+                print(f"WARNING: Could not extract accuracy for {current_gate} from line: {line}")
+
+    stderr_output = proc.stderr.read()
+    proc.wait()
+
+    # Memoize only combinations whose block was printed in full, on disk
+    # (write-then-rename so readers never see a partially written file).
+    # A crashed or truncated run must never enter the cache, or every
+    # later run would silently serve its missing gates as 0% accuracies.
+    incomplete = []
+    for combo in uncached:
+        gate_accuracies = results.get(combo, {})
+        if len(gate_accuracies) == len(GATE_NAMES):
+            cache_file = cache_files[combo]
+            with open(cache_file + '.tmp', 'w') as f:
+                json.dump(gate_accuracies, f)
+            os.replace(cache_file + '.tmp', cache_file)
+        else:
+            incomplete.append(combo)
+
+    if proc.returncode != 0 or incomplete:
+        sys.stderr.write(stderr_output)
+        raise RuntimeError(
+            f"main.elf exited with code {proc.returncode}; "
+            f"combinations without complete results: {incomplete}")
+
+    return results
+
+def best_combo_for_gate(results, gate):
+    """Return the best evaluated ((threshold, delay), accuracy) for a gate"""
+    return max(
+        ((combo, accuracies.get(gate, 0)) for combo, accuracies in results.items()),
+        key=lambda item: item[1]
+    )
+
+def sweep_coordinate(evaluate, results):
+    """Coordinate descent: sweep all thresholds at a fixed pivot delay, lock
+    in each gate's best threshold, then sweep all delays at those thresholds"""
+    pivot_delay = DELAYS[len(DELAYS) // 2]
+    evaluate([(threshold, pivot_delay) for threshold in THRESHOLDS])
+
+    best_thresholds = {best_combo_for_gate(results, gate)[0][0] for gate in GATE_NAMES}
+    evaluate([(threshold, delay) for threshold in sorted(best_thresholds) for delay in DELAYS])
+
+def sweep_coarse2fine(evaluate, results):
+    """Coarse pass over a 3x3 sub-grid, then refine at full resolution in
+    the neighborhood of each gate's best coarse point"""
+    thresholds = list(THRESHOLDS)
+    evaluate([(threshold, delay) for threshold in thresholds[::4] for delay in DELAYS[::4]])
+
+    refine = set()
     for gate in GATE_NAMES:
-        filename = f"grid-search-results/{gate.lower()}_results.txt"
-        result_files[gate] = open(filename, "w")
-        result_files[gate].write(f"# Results for {gate} gate\n")
-        
-        # Fixed-width format for header row - using proper alignment
-        header = "T\\D".ljust(10)
-        for delay in DELAYS:
-            header += str(delay).ljust(12)
-        result_files[gate].write(header + "\n")
-    
-    print("Testing combinations of threshold and delay values for all gates...")
-    print(f"Total combinations to test: {len(THRESHOLDS) * len(DELAYS)}")
-    
-    counter = 0
-    total = len(THRESHOLDS) * len(DELAYS)
-    
-    start_time = time.time()
-    
-    # Test each combination
-    for threshold in THRESHOLDS:
-        # Initialize a row for each gate with fixed-width format
-        rows = {gate: str(threshold).ljust(10) for gate in GATE_NAMES}
-        for delay in DELAYS:
-            counter += 1
-            # Calculate and display elapsed time
-            elapsed = time.time() - start_time
-            elapsed_min = int(elapsed / 60)
-            elapsed_sec = int(elapsed % 60)
-            print(f"Testing combination {counter}/{total} (T={threshold}, D={delay}), Elapsed: {elapsed_min}m {elapsed_sec}s", end="\r")
-            
-            gate_accuracies = test_parameters(threshold, delay)
-            # Add results to each gate's row
-            for gate in GATE_NAMES:
-                accuracy = gate_accuracies.get(gate, 0)
-                # Use the full precision available
-                rows[gate] += f"{accuracy:.3f}".ljust(12)
-        
-        # Write each gate's completed row to its result file
-        for gate in GATE_NAMES:
-            result_files[gate].write(rows[gate] + "\n")
-            result_files[gate].flush()  # Ensure data is written even if the script is interrupted
-    
-    print("\nTesting complete. Results saved to individual files.")
-    
-    # Close all result files
-    for file in result_files.values():
-        file.close()
+        (best_threshold, best_delay), _ = best_combo_for_gate(results, gate)
+        t_idx = thresholds.index(best_threshold)
+        d_idx = DELAYS.index(best_delay)
+        for i in range(max(0, t_idx - 2), min(len(thresholds), t_idx + 3)):
+            for j in range(max(0, d_idx - 2), min(len(DELAYS), d_idx + 3)):
+                refine.add((thresholds[i], DELAYS[j]))
+    evaluate(sorted(refine))
+
+def main(strategy='exhaustive'):
+    # Structured results are appended to one JSONL file per gate and one
+    # consolidated wide TSV (one row per combination, one column per gate)
+    # as they arrive
+    jsonl_files = {
+        gate: open(f"grid-search-results/{gate.lower()}.jsonl", "w")
+        for gate in GATE_NAMES
+    }
+    tsv_file = open("grid-search-results/results.tsv", "w")
+    tsv_file.write("threshold\tdelay\t" + "\t".join(GATE_NAMES) + "\n")
+
+    # Make sure buffered results reach disk even if the sweep is interrupted
+    def close_result_files():
+        for file in list(jsonl_files.values()) + [tsv_file]:
+            if not file.closed:
+                file.close()
+    atexit.register(close_result_files)
+
+    print(f"Testing combinations of threshold and delay values for all gates ({strategy})...")
+    print(f"Grid size: {len(THRESHOLDS) * len(DELAYS)} combinations")
+
+    # Pre-create the build and result cache directories once
+    os.makedirs('build', exist_ok=True)
+    os.makedirs(RESULT_CACHE_DIR, exist_ok=True)
+
+    # Compile the test binary once up front
+    build_test_binary()
+
+    results = {}
+
+    def evaluate(combos):
+        """Evaluate the given combinations in parallel (one worker per CPU
+        core, one main.elf invocation per chunk) and fold them into results"""
+        combos = [combo for combo in combos if combo not in results]
+        if not combos:
+            return
+
+        chunks = [combos[i:i + SWEEP_CHUNK_SIZE] for i in range(0, len(combos), SWEEP_CHUNK_SIZE)]
+        progress = tqdm(total=len(combos), desc="Testing combinations", unit="combo") if tqdm else None
+        done = 0
+        with ProcessPoolExecutor(max_workers=os.cpu_count()) as executor:
+            futures = [executor.submit(test_parameter_chunk, chunk) for chunk in chunks]
+            for future in as_completed(futures):
+                chunk_results = future.result()
+
+                # Append each finished combination to the per-gate JSONL
+                # files and the consolidated TSV
+                for (threshold, delay), gate_accuracies in chunk_results.items():
+                    for gate in GATE_NAMES:
+                        record = {"t": threshold, "d": delay, "acc": gate_accuracies.get(gate, 0)}
+                        jsonl_files[gate].write(json.dumps(record) + "\n")
+                    tsv_file.write(f"{threshold}\t{delay}\t" + "\t".join(
+                        f"{gate_accuracies.get(gate, 0):.3f}" for gate in GATE_NAMES) + "\n")
+
+                results.update(chunk_results)
+                done += len(chunk_results)
+                if progress:
+                    progress.update(len(chunk_results))
+                else:
+                    print(f"Finished {done}/{len(combos)} combinations", end="\r")
+        if progress:
+            progress.close()
+
+    if strategy == 'coordinate':
+        sweep_coordinate(evaluate, results)
+    elif strategy == 'coarse2fine':
+        sweep_coarse2fine(evaluate, results)
+    else:
+        evaluate([(threshold, delay) for threshold in THRESHOLDS for delay in DELAYS])
+
+    print(f"\nEvaluated {len(results)} of {len(THRESHOLDS) * len(DELAYS)} combinations.")
+
+    # Close the structured result files (single flush at end-of-sweep)
+    close_result_files()
+
+    print("\nTesting complete. Results saved to grid-search-results/results.tsv.")
     
     # Generate a summary of the best configurations and save to output.txt
+    # (taken straight from the in-memory results, not the result files)
     best_configs = []
     print("\nBest configurations for each gate:")
     for gate in GATE_NAMES:
-        best_threshold = 0
-        best_delay = 0
-        best_accuracy = 0
-        
-        with open(f"grid-search-results/{gate.lower()}_results.txt", "r") as f:
-            lines = f.readlines()[2:]  # Skip header lines
-            
-            for line in lines:
-                parts = line.strip().split()
-                if not parts:
-                    continue
-                    
-                threshold = int(parts[0])
-                
-                # Extract all accuracy values (every value after the threshold)
-                accuracies = []
-                for value in parts[1:]:
-                    try:
-                        accuracies.append(float(value))
-                    except ValueError:
-                        pass
-                
-                # Find best accuracy in this row
-                for i, accuracy in enumerate(accuracies):
-                    if i < len(DELAYS) and accuracy > best_accuracy:
-                        best_accuracy = accuracy
-                        best_threshold = threshold
-                        best_delay = DELAYS[i]
-        
+        (best_threshold, best_delay), best_accuracy = best_combo_for_gate(results, gate)
+
         result_line = f"{gate}: Threshold={best_threshold}, Delay={best_delay}, Accuracy={best_accuracy:.3f}%"
         print(result_line)
         best_configs.append(result_line)
@@ -189,4 +337,10 @@ def main():
     print("\nBest configurations saved to output.txt")
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--strategy', choices=['exhaustive', 'coordinate', 'coarse2fine'],
+                        default='exhaustive',
+                        help="search strategy over the (threshold, delay) grid "
+                             "(default: exhaustive)")
+    args = parser.parse_args()
+    main(strategy=args.strategy)
\ No newline at end of file
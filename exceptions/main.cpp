@@ -1,6 +1,7 @@
 #include <stdio.h>
 #include <stdint.h>
 #include <stdlib.h>
+#include <string.h>
 #include <math.h>
 #include <argp.h>
 #include <time.h>
@@ -9,14 +10,9 @@
 #include "gates/single.h"
 #include "gates/compose.h"
 
-/* Config */
-#define THRESHOLD 125
-#ifdef INTEL
-#define DELAY 128
-#else
-#define DELAY 128
-#endif
+/* Config (threshold/delay defaults live in gates/compose.cpp) */
 bool verbose = false;
+char* sweep = NULL;
 unsigned tot_trials = 100;
 unsigned single_trial = 10000;
 
@@ -33,19 +29,19 @@ bool do_assign_gate(unsigned input) {
     assign(reg1, input & 1);
     _mm_clflush(reg2);
     _mm_clflush(reg3);
-    for (volatile int z = 0; z < DELAY; z++) {}
+    for (volatile int z = 0; z < delay; z++) {}
 
     assign_gate(reg1, reg2, reg3);
 
     #ifndef INTEL
-    for (volatile int z = 0; z < DELAY; z++) {}
+    for (volatile int z = 0; z < delay; z++) {}
     #endif
 
     uint64_t clk = timer(reg2);
     uint64_t clk2 = timer(reg3);
     return (
-        ((clk <= THRESHOLD) == (input & 1)) && 
-        ((clk2 <= THRESHOLD) == (input & 1))
+        ((clk <= threshold) == (input & 1)) && 
+        ((clk2 <= threshold) == (input & 1))
     );
 }
 
@@ -55,16 +51,16 @@ bool do_or_gate(unsigned input) {
     assign(reg1, input & 1);
     assign(reg2, input & 2);
     _mm_clflush(reg3);
-    for (volatile int z = 0; z < DELAY; z++) {}
+    for (volatile int z = 0; z < delay; z++) {}
 
     or_gate(reg1, reg2, reg3);
 
     #ifndef INTEL
-    for (volatile int z = 0; z < DELAY; z++) {}
+    for (volatile int z = 0; z < delay; z++) {}
     #endif
 
     uint64_t clk = timer(reg3);
-    return (clk <= THRESHOLD) == ((input & 3) > 0);
+    return (clk <= threshold) == ((input & 3) > 0);
 }
 
 bool do_and_gate(unsigned input) {    
@@ -73,16 +69,16 @@ bool do_and_gate(unsigned input) {
     assign(reg1, input & 1);
     assign(reg2, input & 2);
     _mm_clflush(reg3);
-    for (volatile int z = 0; z < DELAY; z++) {}
+    for (volatile int z = 0; z < delay; z++) {}
 
     and_gate(reg1, reg2, reg3);
 
     #ifndef INTEL
-    for (volatile int z = 0; z < DELAY; z++) {}
+    for (volatile int z = 0; z < delay; z++) {}
     #endif
 
     uint64_t clk = timer(reg3);
-    return (clk <= THRESHOLD) == ((input & 3) == 3);
+    return (clk <= threshold) == ((input & 3) == 3);
 }
 
 bool do_not_gate(unsigned input) {
@@ -93,16 +89,16 @@ bool do_not_gate(unsigned input) {
     assign(reg2, input & 1);
     _mm_clflush(reg3);
     _mm_clflush(reg4);
-    for (volatile int z = 0; z < DELAY; z++) {}
+    for (volatile int z = 0; z < delay; z++) {}
 
     not_gate(reg1, reg2, reg3, reg4);
 
     #ifndef INTEL
-    for (volatile int z = 0; z < DELAY; z++) {}
+    for (volatile int z = 0; z < delay; z++) {}
     #endif
 
     uint64_t clk = timer(reg3);
-    return (clk <= THRESHOLD) == ((input & 1) == 0);
+    return (clk <= threshold) == ((input & 1) == 0);
 }
 
 bool do_nand_gate(unsigned input) {    
@@ -112,13 +108,13 @@ bool do_nand_gate(unsigned input) {
     assign(reg1, input & 1);
     assign(reg2, input & 2);
     _mm_clflush(reg3);
-    for (volatile int z = 0; z < DELAY; z++) {}
+    for (volatile int z = 0; z < delay; z++) {}
 
     nand_gate(reg1, reg2, reg3);
-    for (volatile int z = 0; z < DELAY; z++) {}
+    for (volatile int z = 0; z < delay; z++) {}
  
     uint64_t clk = timer(reg3);
-    return (clk <= THRESHOLD) == ((input & 3) != 3);
+    return (clk <= threshold) == ((input & 3) != 3);
 }
 
 bool do_xor_gate(unsigned input) {    
@@ -130,10 +126,10 @@ bool do_xor_gate(unsigned input) {
     _mm_clflush(reg3);
 
     xor_gate(reg1, reg2, reg3, input);
-    for (volatile int z = 0; z < DELAY; z++) {}
+    for (volatile int z = 0; z < delay; z++) {}
 
     uint64_t clk = timer(reg3);
-    return (clk <= THRESHOLD) == (
+    return (clk <= threshold) == (
         ((input & 3) > 0) && ((input & 3) < 3)
     );
 }
@@ -149,10 +145,10 @@ bool do_mux_gate(unsigned input) {
     _mm_clflush(reg4);
 
     mux_gate(reg1, reg2, reg3, reg4, input);
-    for (volatile int z = 0; z < DELAY; z++) {}
+    for (volatile int z = 0; z < delay; z++) {}
 
     uint64_t clk = timer(reg4);
-    return (clk <= THRESHOLD) == (
+    return (clk <= threshold) == (
         (input & 4) ? ((input & 2) == 2) : (input & 1)
     );
 }
@@ -253,13 +249,19 @@ static struct argp_option options[] = {
     { "verbose", 'v', 0, 0, "Produce verbose output"},
     { "iter", 'i', "ITER", 0, "Number of iterations in each trial (default: 10000)."},
     { "trial", 't', "TRIAL", 0, "Number of trials (default: 100)."},
-    { 0 } 
+    { "threshold", 'T', "THRESHOLD", 0, "Cache-hit threshold in cycles (default: 125)."},
+    { "delay", 'd', "DELAY", 0, "Delay loop iterations (default: 128)."},
+    { "sweep", 's', "SWEEP", 0, "Semicolon-separated threshold,delay pairs to test in one run (e.g. \"125,128;150,256\")."},
+    { 0 }
 };
 static error_t parse_opt(int key, char *arg, struct argp_state *state) {
     switch (key) {
         case 'v': verbose = true; break;
         case 'i': single_trial = atoi(arg); break;
         case 't': tot_trials = atoi(arg); break;
+        case 'T': threshold = atoi(arg); break;
+        case 'd': delay = atoi(arg); break;
+        case 's': sweep = arg; break;
         case ARGP_KEY_ARG: return 0;
         default: return ARGP_ERR_UNKNOWN;
     }   
@@ -267,18 +269,9 @@ static error_t parse_opt(int key, char *arg, struct argp_state *state) {
 }
 static struct argp argp = { options, parse_opt, args_doc, doc, 0, 0, 0 };
 
-int main(int argc, char* argv[]) {
-    struct sigaction sa = {0};
-    sigemptyset(&sa.sa_mask);
-    sa.sa_sigaction = signal_handler;
-    sa.sa_flags = SA_SIGINFO;
-
-    // Install signal handler
-    sigaction(SIGFPE, &sa, NULL);
-
-    argp_parse(&argp, argc, argv, 0, 0, 0);
-
-    printf("Configuration: THRESHOLD=%d, DELAY=%d\n", THRESHOLD, DELAY);
+/* Test all gates under the current threshold/delay configuration */
+void test_all_gates() {
+    printf("Configuration: THRESHOLD=%d, DELAY=%d\n", threshold, delay);
     printf("Testing with %d trials, %d iterations per trial\n\n", tot_trials, single_trial);
 
     // test_gate("GATE_NAME_PLACEHOLDER", GATE_FUNCTION_PLACEHOLDER, GATE_INPUTS_PLACEHOLDER);
@@ -291,3 +284,31 @@ int main(int argc, char* argv[]) {
     test_gate("XOR",    do_xor_gate,    2);
     test_gate("MUX",    do_mux_gate,    3);
 }
+
+int main(int argc, char* argv[]) {
+    struct sigaction sa = {0};
+    sigemptyset(&sa.sa_mask);
+    sa.sa_sigaction = signal_handler;
+    sa.sa_flags = SA_SIGINFO;
+
+    // Install signal handler
+    sigaction(SIGFPE, &sa, NULL);
+
+    argp_parse(&argp, argc, argv, 0, 0, 0);
+
+    if (sweep) {
+        // Run one block per configuration in the sweep list, amortizing
+        // process start-up across all of them
+        for (char* pair = strtok(sweep, ";"); pair; pair = strtok(NULL, ";")) {
+            if (sscanf(pair, "%d,%d", &threshold, &delay) == 2) {
+                test_all_gates();
+            }
+            else {
+                fprintf(stderr, "Ignoring malformed sweep entry: %s\n", pair);
+            }
+        }
+    }
+    else {
+        test_all_gates();
+    }
+}